@@ -16,6 +16,10 @@ class Config:
     # Database settings
     DATABASE_NAME = os.getenv("DATABASE_NAME", "reddit_stocks.db")
     
+    # Price history cache settings
+    STOCK_CACHE_DIR = os.getenv("STOCK_CACHE_DIR", "cache")
+    STOCK_CACHE_MAX_AGE_HOURS = 24
+    
     # Analysis settings
     DEFAULT_POST_LIMIT = int(os.getenv("DEFAULT_POST_LIMIT", "100"))
     TIME_PERIODS = [
@@ -27,5 +31,5 @@ class Config:
     ]
     
     # API rate limiting
-    YAHOO_FINANCE_DELAY = 0.1  # Seconds between requests
-    TICKER_VALIDATION_DELAY = 0.2  # Seconds between ticker validations
\ No newline at end of file
+    TICKER_VALIDATION_DELAY = 0.2  # Seconds between ticker validations
+    TICKER_CACHE_MAX_AGE_DAYS = 7  # Days before a cached validation is re-checked
\ No newline at end of file
@@ -1,21 +1,72 @@
 """Database operations for storing and retrieving stock data"""
 
+import itertools
+import queue
 import sqlite3
-from typing import List, Dict
+import pandas as pd
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Dict, Optional
 from models import StockMention, StockPerformance
 
+# Store dates as ISO-8601 TEXT; sqlite3 applies these while binding parameters
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_adapter(date, date.isoformat)
+
+# Rows per executemany call; bounds memory while keeping the statement prepared once
+INSERT_CHUNK_SIZE = 5000
+
+def _chunks(rows: Iterable[tuple], size: int = INSERT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """Split an iterable of rows into lists of at most size rows"""
+    it = iter(rows)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            break
+        yield chunk
+
 class Database:
-    """Handles all database operations"""
+    """Handles all database operations
     
-    def __init__(self, db_name: str):
+    A single writer connection is shared behind a lock, and read-only
+    connections are handed out from a small pool so diagnostics and
+    analytics never wait on a write in progress (WAL mode). For an
+    in-memory database the pool hands out the writer connection instead.
+    """
+    
+    def __init__(self, db_name: str, pool_size: int = 4):
         self.db_name = db_name
-        self.conn = None
+        self.pool_size = pool_size
+        self.write_conn = None
+        self.read_pool = queue.Queue(maxsize=pool_size)
+        self._write_lock = threading.Lock()
         self.init_database()
     
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection configured for this database"""
+        if read_only:
+            uri = f"{Path(self.db_name).absolute().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+        else:
+            # Autocommit mode; writer() manages its own BEGIN/COMMIT
+            conn = sqlite3.connect(self.db_name, isolation_level=None, check_same_thread=False)
+            conn.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+            ''')
+        conn.executescript('''
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        ''')
+        return conn
+    
     def init_database(self):
-        """Initialize SQLite database and create tables"""
-        self.conn = sqlite3.connect(self.db_name)
-        cursor = self.conn.cursor()
+        """Initialize SQLite database, create tables and open the reader pool"""
+        self.write_conn = self._connect()
+        cursor = self.write_conn.cursor()
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS stock_mentions (
@@ -51,156 +102,243 @@ class Database:
             )
         ''')
         
-        self.conn.commit()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ticker_cache (
+                ticker TEXT PRIMARY KEY,
+                is_valid INTEGER,
+                checked_at TEXT
+            )
+        ''')
+        
+        # The UNIQUE constraints already index (ticker, post_id) and (ticker, post_date);
+        # this partial index serves the "ANY return data" filter
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_perf_has_return ON stock_performance(ticker)
+            WHERE return_1d IS NOT NULL 
+               OR return_3d IS NOT NULL 
+               OR return_1w IS NOT NULL 
+               OR return_2w IS NOT NULL 
+               OR return_1m IS NOT NULL
+        ''')
+        
+        # Refresh planner statistics so the partial index is costed correctly
+        cursor.execute('ANALYZE')
+        
+        # Readers can only be opened once the database file exists. An in-memory
+        # database is private to its connection, so readers share the writer's.
+        for _ in range(self.pool_size):
+            if self.db_name == ':memory:':
+                self.read_pool.put(self.write_conn)
+            else:
+                self.read_pool.put(self._connect(read_only=True))
+    
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool"""
+        conn = self.read_pool.get()
+        try:
+            yield conn
+        finally:
+            self.read_pool.put(conn)
     
-    def save_mentions(self, mentions: List[StockMention]):
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection for the duration of one transaction"""
+        with self._write_lock:
+            self.write_conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.write_conn
+            except BaseException:
+                self.write_conn.rollback()
+                raise
+            self.write_conn.commit()
+    
+    def save_mentions(self, mentions: Iterable[StockMention]):
         """Save stock mentions to database"""
-        cursor = self.conn.cursor()
+        rows = (
+            (m.ticker, m.post_id, m.post_title, m.post_date,
+             m.post_score, m.post_url, m.author)
+            for m in mentions
+        )
         
-        for mention in mentions:
-            cursor.execute('''
-                INSERT OR REPLACE INTO stock_mentions 
-                (ticker, post_id, post_title, post_date, post_score, post_url, author)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                mention.ticker, mention.post_id, mention.post_title,
-                mention.post_date.isoformat(), mention.post_score,
-                mention.post_url, mention.author
-            ))
-        
-        self.conn.commit()
-        print(f"Saved {len(mentions)} mentions to database")
+        saved_count = 0
+        with self.writer() as conn:
+            for chunk in _chunks(rows):
+                conn.executemany('''
+                    INSERT OR REPLACE INTO stock_mentions 
+                    (ticker, post_id, post_title, post_date, post_score, post_url, author)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', chunk)
+                saved_count += len(chunk)
+        print(f"Saved {saved_count} mentions to database")
     
     def save_performances(self, performances: List[StockPerformance]):
         """Save stock performance data to database"""
-        cursor = self.conn.cursor()
+        rows = (
+            (p.ticker, p.post_date, p.price_at_post,
+             p.price_1d, p.price_3d, p.price_1w, p.price_2w, p.price_1m,
+             p.return_1d, p.return_3d, p.return_1w, p.return_2w, p.return_1m)
+            for p in performances
+        )
         
         saved_count = 0
-        for perf in performances:
-            cursor.execute('''
-                INSERT OR REPLACE INTO stock_performance
-                (ticker, post_date, price_at_post, price_1d, price_3d, price_1w, price_2w, price_1m,
-                 return_1d, return_3d, return_1w, return_2w, return_1m)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                perf.ticker, perf.post_date.isoformat(), perf.price_at_post,
-                perf.price_1d, perf.price_3d, perf.price_1w, perf.price_2w, perf.price_1m,
-                perf.return_1d, perf.return_3d, perf.return_1w, perf.return_2w, perf.return_1m
-            ))
-            saved_count += 1
-            
-            # Debug output
-            returns = []
-            if perf.return_1d is not None:
-                returns.append(f"1d:{perf.return_1d:.1f}%")
-            if perf.return_3d is not None:
-                returns.append(f"3d:{perf.return_3d:.1f}%")
-            if perf.return_1w is not None:
-                returns.append(f"1w:{perf.return_1w:.1f}%")
-            if perf.return_2w is not None:
-                returns.append(f"2w:{perf.return_2w:.1f}%")
-            if perf.return_1m is not None:
-                returns.append(f"1m:{perf.return_1m:.1f}%")
-            
-            print(f"  Saved {perf.ticker}: [{', '.join(returns)}]")
+        with self.writer() as conn:
+            for chunk in _chunks(rows):
+                conn.executemany('''
+                    INSERT OR REPLACE INTO stock_performance
+                    (ticker, post_date, price_at_post, price_1d, price_3d, price_1w, price_2w, price_1m,
+                     return_1d, return_3d, return_1w, return_2w, return_1m)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', chunk)
+                saved_count += len(chunk)
         
-        self.conn.commit()
+        # Debug output, formatted after the insert so it stays off the write path
+        if saved_count:
+            print("\n".join(self._format_saved_performance(perf) for perf in performances))
         print(f"\n✓ Saved {saved_count} performance records to database")
     
-    def get_all_performance_data(self) -> List[tuple]:
-        """Retrieve all performance data from database (with ANY return data)"""
-        cursor = self.conn.cursor()
-        # Get records with ANY return data, not just 1d
-        cursor.execute('''
-            SELECT * FROM stock_performance 
-            WHERE return_1d IS NOT NULL 
-               OR return_3d IS NOT NULL 
-               OR return_1w IS NOT NULL 
-               OR return_2w IS NOT NULL 
-               OR return_1m IS NOT NULL
-        ''')
-        return cursor.fetchall()
+    @staticmethod
+    def _format_saved_performance(perf: StockPerformance) -> str:
+        """Format a one-line summary of a saved performance record"""
+        returns = []
+        if perf.return_1d is not None:
+            returns.append(f"1d:{perf.return_1d:.1f}%")
+        if perf.return_3d is not None:
+            returns.append(f"3d:{perf.return_3d:.1f}%")
+        if perf.return_1w is not None:
+            returns.append(f"1w:{perf.return_1w:.1f}%")
+        if perf.return_2w is not None:
+            returns.append(f"2w:{perf.return_2w:.1f}%")
+        if perf.return_1m is not None:
+            returns.append(f"1m:{perf.return_1m:.1f}%")
+        return f"  Saved {perf.ticker}: [{', '.join(returns)}]"
+    
+    def get_ticker_validation(self, ticker: str, max_age: timedelta) -> Optional[bool]:
+        """Return the cached validation result for a ticker, or None if missing or stale"""
+        cutoff = datetime.now() - max_age
+        with self.reader() as conn:
+            row = conn.execute(
+                'SELECT is_valid FROM ticker_cache WHERE ticker = ? AND checked_at >= ?',
+                (ticker, cutoff)
+            ).fetchone()
+        return None if row is None else bool(row[0])
+    
+    def save_ticker_validation(self, ticker: str, is_valid: bool):
+        """Record a ticker validation result in the cache"""
+        with self.writer() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO ticker_cache (ticker, is_valid, checked_at)
+                VALUES (?, ?, ?)
+            ''', (ticker, int(is_valid), datetime.now()))
+    
+    def load_performance_df(self) -> pd.DataFrame:
+        """Load performance records with ANY return data as a typed DataFrame"""
+        return_cols = ['return_1d', 'return_3d', 'return_1w', 'return_2w', 'return_1m']
+        with self.reader() as conn:
+            # Get records with ANY return data, not just 1d
+            return pd.read_sql_query('''
+                SELECT ticker, post_date, return_1d, return_3d, return_1w, return_2w, return_1m
+                FROM stock_performance 
+                WHERE return_1d IS NOT NULL 
+                   OR return_3d IS NOT NULL 
+                   OR return_1w IS NOT NULL 
+                   OR return_2w IS NOT NULL 
+                   OR return_1m IS NOT NULL
+            ''', conn, parse_dates=['post_date'], dtype={col: 'float64' for col in return_cols})
     
     def diagnose_database(self):
         """Diagnose what's in the database"""
-        cursor = self.conn.cursor()
-        
-        print("\n" + "="*60)
-        print("DATABASE DIAGNOSTICS")
-        print("="*60)
-        
-        # Check mentions
-        cursor.execute('SELECT COUNT(*) FROM stock_mentions')
-        mention_count = cursor.fetchone()[0]
-        print(f"\n📊 Stock Mentions: {mention_count}")
-        
-        if mention_count > 0:
-            cursor.execute('SELECT ticker, COUNT(*) as count FROM stock_mentions GROUP BY ticker ORDER BY count DESC LIMIT 10')
-            print("\nTop mentioned tickers:")
-            for ticker, count in cursor.fetchall():
-                print(f"  {ticker}: {count} mentions")
-        
-        # Check all performance records
-        cursor.execute('SELECT COUNT(*) FROM stock_performance')
-        perf_count = cursor.fetchone()[0]
-        print(f"\n📈 Performance Records: {perf_count}")
-        
-        if perf_count > 0:
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            print("\n" + "="*60)
+            print("DATABASE DIAGNOSTICS")
+            print("="*60)
+            
+            # All scalar counts in one round trip
             cursor.execute('''
-                SELECT ticker, 
-                       COUNT(*) as total,
-                       SUM(CASE WHEN return_1d IS NOT NULL THEN 1 ELSE 0 END) as has_1d,
-                       SUM(CASE WHEN return_3d IS NOT NULL THEN 1 ELSE 0 END) as has_3d,
-                       SUM(CASE WHEN return_1w IS NOT NULL THEN 1 ELSE 0 END) as has_1w,
-                       SUM(CASE WHEN return_2w IS NOT NULL THEN 1 ELSE 0 END) as has_2w,
-                       SUM(CASE WHEN return_1m IS NOT NULL THEN 1 ELSE 0 END) as has_1m
-                FROM stock_performance 
-                GROUP BY ticker
+                SELECT (SELECT COUNT(*) FROM stock_mentions),
+                       COUNT(*),
+                       COALESCE(SUM(return_1d IS NOT NULL), 0),
+                       COALESCE(SUM(return_3d IS NOT NULL), 0),
+                       COALESCE(SUM(return_1w IS NOT NULL), 0),
+                       COALESCE(SUM(return_2w IS NOT NULL), 0),
+                       COALESCE(SUM(return_1m IS NOT NULL), 0),
+                       COALESCE(SUM(return_1d IS NOT NULL 
+                                 OR return_3d IS NOT NULL 
+                                 OR return_1w IS NOT NULL 
+                                 OR return_2w IS NOT NULL 
+                                 OR return_1m IS NOT NULL), 0)
+                FROM stock_performance
             ''')
+            (mention_count, perf_count, all_1d, all_3d, all_1w, all_2w, all_1m,
+             records_with_data) = cursor.fetchone()
+            
+            # Check mentions
+            print(f"\n📊 Stock Mentions: {mention_count}")
+            
+            if mention_count > 0:
+                cursor.execute('SELECT ticker, COUNT(*) as count FROM stock_mentions GROUP BY ticker ORDER BY count DESC LIMIT 10')
+                print("\nTop mentioned tickers:")
+                for ticker, count in cursor.fetchall():
+                    print(f"  {ticker}: {count} mentions")
+            
+            # Check all performance records
+            print(f"\n📈 Performance Records: {perf_count}")
+            
+            if perf_count > 0:
+                cursor.execute('''
+                    SELECT ticker, 
+                           COUNT(*) as total,
+                           SUM(CASE WHEN return_1d IS NOT NULL THEN 1 ELSE 0 END) as has_1d,
+                           SUM(CASE WHEN return_3d IS NOT NULL THEN 1 ELSE 0 END) as has_3d,
+                           SUM(CASE WHEN return_1w IS NOT NULL THEN 1 ELSE 0 END) as has_1w,
+                           SUM(CASE WHEN return_2w IS NOT NULL THEN 1 ELSE 0 END) as has_2w,
+                           SUM(CASE WHEN return_1m IS NOT NULL THEN 1 ELSE 0 END) as has_1m
+                    FROM stock_performance 
+                    GROUP BY ticker
+                    ORDER BY total DESC
+                    LIMIT 20
+                ''')
+            
+                print("\nPerformance data by ticker (top 20):")
+                print("Ticker | Records | 1d | 3d | 1w | 2w | 1m")
+                print("-" * 50)
+                for row in cursor.fetchall():
+                    ticker, total, d1, d3, w1, w2, m1 = row
+                    print(f"{ticker:6} | {total:7} | {d1:2} | {d3:2} | {w1:2} | {w2:2} | {m1:2}")
+                print("-" * 50)
+                print(f"{'ALL':6} | {perf_count:7} | {all_1d:2} | {all_3d:2} | {all_1w:2} | {all_2w:2} | {all_1m:2}")
+            
+            # Check records with ANY return data
+            print(f"\n✓ Records with ANY return data: {records_with_data}")
             
-            print("\nPerformance data by ticker:")
-            print("Ticker | Records | 1d | 3d | 1w | 2w | 1m")
-            print("-" * 50)
+            # Show sample of actual data
+            cursor.execute('''
+                SELECT ticker, post_date, price_at_post, return_1d, return_3d, return_1w, return_2w, return_1m
+                FROM stock_performance
+                LIMIT 5
+            ''')
+            
+            print("\nSample performance records:")
+            print("Ticker | Date | Price | 1d | 3d | 1w | 2w | 1m")
+            print("-" * 80)
             for row in cursor.fetchall():
-                ticker, total, d1, d3, w1, w2, m1 = row
-                print(f"{ticker:6} | {total:7} | {d1:2} | {d3:2} | {w1:2} | {w2:2} | {m1:2}")
-        
-        # Check records with ANY return data
-        cursor.execute('''
-            SELECT COUNT(*) FROM stock_performance 
-            WHERE return_1d IS NOT NULL 
-               OR return_3d IS NOT NULL 
-               OR return_1w IS NOT NULL 
-               OR return_2w IS NOT NULL 
-               OR return_1m IS NOT NULL
-        ''')
-        records_with_data = cursor.fetchone()[0]
-        print(f"\n✓ Records with ANY return data: {records_with_data}")
-        
-        # Show sample of actual data
-        cursor.execute('''
-            SELECT ticker, post_date, price_at_post, return_1d, return_3d, return_1w, return_2w, return_1m
-            FROM stock_performance
-            LIMIT 5
-        ''')
-        
-        print("\nSample performance records:")
-        print("Ticker | Date | Price | 1d | 3d | 1w | 2w | 1m")
-        print("-" * 80)
-        for row in cursor.fetchall():
-            ticker, date, price, r1d, r3d, r1w, r2w, r1m = row
-            date_str = date[:10] if date else "N/A"
-            price_str = f"${price:.2f}" if price else "N/A"
-            r1d_str = f"{r1d:+.1f}%" if r1d else "None"
-            r3d_str = f"{r3d:+.1f}%" if r3d else "None"
-            r1w_str = f"{r1w:+.1f}%" if r1w else "None"
-            r2w_str = f"{r2w:+.1f}%" if r2w else "None"
-            r1m_str = f"{r1m:+.1f}%" if r1m else "None"
-            print(f"{ticker:6} | {date_str} | {price_str:8} | {r1d_str:7} | {r3d_str:7} | {r1w_str:7} | {r2w_str:7} | {r1m_str:7}")
-        
-        print("="*60 + "\n")
+                ticker, date, price, r1d, r3d, r1w, r2w, r1m = row
+                date_str = date[:10] if date else "N/A"
+                price_str = f"${price:.2f}" if price else "N/A"
+                r1d_str = f"{r1d:+.1f}%" if r1d else "None"
+                r3d_str = f"{r3d:+.1f}%" if r3d else "None"
+                r1w_str = f"{r1w:+.1f}%" if r1w else "None"
+                r2w_str = f"{r2w:+.1f}%" if r2w else "None"
+                r1m_str = f"{r1m:+.1f}%" if r1m else "None"
+                print(f"{ticker:6} | {date_str} | {price_str:8} | {r1d_str:7} | {r3d_str:7} | {r1w_str:7} | {r2w_str:7} | {r1m_str:7}")
+            
+            print("="*60 + "\n")
     
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
\ No newline at end of file
+        """Close the writer and all pooled reader connections"""
+        while not self.read_pool.empty():
+            self.read_pool.get_nowait().close()
+        if self.write_conn:
+            self.write_conn.close()
\ No newline at end of file
@@ -16,7 +16,8 @@ class RedditStockAnalyzerApp:
             client_id=self.config.REDDIT_CLIENT_ID,
             client_secret=self.config.REDDIT_CLIENT_SECRET,
             user_agent=self.config.REDDIT_USER_AGENT,
-            subreddit=self.config.SUBREDDIT_NAME
+            subreddit=self.config.SUBREDDIT_NAME,
+            db=self.db
         )
         self.analyzer = StockAnalyzer()
         self.visualizer = Visualizer()
@@ -62,14 +63,14 @@ class RedditStockAnalyzerApp:
         self.db.diagnose_database()
         
         # Step 4: Analyze profitability
-        data = self.db.get_all_performance_data()
-        results = self.visualizer.analyze_profitability(data)
+        df = self.db.load_performance_df()
+        results = self.visualizer.analyze_profitability(df)
         
         # Step 5: Print results
         self.visualizer.print_results(results)
         
         # Step 6: Create visualizations
-        self.visualizer.create_visualizations(data)
+        self.visualizer.create_visualizations(df)
         
         return results
     
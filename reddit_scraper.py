@@ -1,13 +1,14 @@
 import praw
 from datetime import datetime
-from typing import List
+from typing import Iterator, List, Optional
+from database import Database
 from models import StockMention
 from ticker_extractor import TickerExtractor
 
 class RedditScraper:
     """Scrapes Reddit for stock mentions"""
     
-    def __init__(self, client_id: str, client_secret: str, user_agent: str, subreddit: str, validation_delay: float = 0.2):
+    def __init__(self, client_id: str, client_secret: str, user_agent: str, subreddit: str, validation_delay: float = 0.2, db: Optional[Database] = None):
         self.reddit = praw.Reddit(
             client_id=client_id,
             client_secret=client_secret,
@@ -15,7 +16,7 @@ class RedditScraper:
         )
         self.subreddit_name = subreddit
         # allow speeding up validation during tests by passing validation_delay
-        self.ticker_extractor = TickerExtractor(validation_delay=validation_delay)
+        self.ticker_extractor = TickerExtractor(validation_delay=validation_delay, db=db)
     
     def fetch_posts(
         self,
@@ -54,6 +55,16 @@ class RedditScraper:
         else:
             raise ValueError(f"Invalid sort option: {sort_by}")
 
+        post_ids = set()
+        for mention in self._iter_mentions(posts, use_title_only):
+            post_ids.add(mention.post_id)
+            mentions.append(mention)
+
+        print(f"Found {len(mentions)} stock mentions in {len(post_ids)} posts")
+        return mentions
+
+    def _iter_mentions(self, posts, use_title_only: bool) -> Iterator[StockMention]:
+        """Yield a StockMention for every validated ticker in each post"""
         for post in posts:
             text_to_analyze = post.title if use_title_only else f"{post.title} {post.selftext}"
             tickers = self.ticker_extractor.extract_tickers_from_text(text_to_analyze)
@@ -65,7 +76,7 @@ class RedditScraper:
             post_date = datetime.fromtimestamp(post.created_utc)
 
             for ticker in tickers:
-                mention = StockMention(
+                yield StockMention(
                     ticker=ticker,
                     post_id=post.id,
                     post_title=post.title,
@@ -74,7 +85,3 @@ class RedditScraper:
                     post_url=f"https://reddit.com{post.permalink}",
                     author=str(post.author) if post.author else "deleted"
                 )
-                mentions.append(mention)
-
-        print(f"Found {len(mentions)} stock mentions in {len(set([m.post_id for m in mentions]))} posts")
-        return mentions
\ No newline at end of file
@@ -1,10 +1,11 @@
 """Stock performance analysis using Yahoo Finance"""
 
+import time
 import yfinance as yf
 import pandas as pd
-import time
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from models import StockMention, StockPerformance
 from config import Config
 
@@ -13,33 +14,127 @@ class StockAnalyzer:
     
     def __init__(self):
         self.time_periods = Config.TIME_PERIODS
-        self.api_delay = Config.YAHOO_FINANCE_DELAY
+        self.price_data: Dict[str, pd.DataFrame] = {}
+        self.cache_dir = Path(Config.STOCK_CACHE_DIR)
+        self.cache_max_age = Config.STOCK_CACHE_MAX_AGE_HOURS * 3600
+    
+    def _cache_path(self, ticker: str, start_date: date, end_date: date) -> Path:
+        """Path of the on-disk price cache for one ticker and date window"""
+        return self.cache_dir / f"{ticker}_{start_date}_{end_date}.csv"
     
-    def get_stock_data(self, ticker: str, start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
-        """Fetch stock data from Yahoo Finance"""
+    def _is_expired(self, path: Path) -> bool:
+        """True if a cache file is older than the configured max age"""
+        return time.time() - path.stat().st_mtime > self.cache_max_age
+    
+    def _prune_cache(self):
+        """Delete expired cache files so the cache directory stays bounded"""
+        for path in self.cache_dir.glob('*.csv'):
+            try:
+                if self._is_expired(path):
+                    path.unlink()
+            except OSError:
+                continue
+    
+    def _load_cached(self, ticker: str, start_date: date, end_date: date) -> Optional[pd.DataFrame]:
+        """Return fresh cached price data whose window covers [start_date, end_date), otherwise None"""
+        for path in self.cache_dir.glob(f"{ticker}_*.csv"):
+            try:
+                # ISO dates compare correctly as strings
+                _, cached_start, cached_end = path.stem.rsplit('_', 2)
+                if cached_start > str(start_date) or cached_end < str(end_date) or self._is_expired(path):
+                    continue
+                return pd.read_csv(path, index_col=0, parse_dates=True)
+            except Exception:
+                continue
+        return None
+    
+    def prefetch_stock_data(self, windows: Dict[str, Tuple[date, date]]):
+        """Fetch stock data for each ticker's window, from the disk cache or one batched Yahoo Finance request"""
+        self.price_data = {}
+        self._prune_cache()
+        missing = []
+        for ticker, (ticker_start, ticker_end) in windows.items():
+            cached = self._load_cached(ticker, ticker_start, ticker_end)
+            if cached is None:
+                missing.append(ticker)
+            else:
+                self.price_data[ticker] = cached
+        
+        if not missing:
+            return
+        
+        # One request spanning every uncached ticker's window
+        start_date = min(windows[ticker][0] for ticker in missing)
+        end_date = max(windows[ticker][1] for ticker in missing)
+        print(f"Fetching price history for {len(missing)} tickers from {start_date} to {end_date}")
         try:
-            stock = yf.Ticker(ticker)
-            data = stock.history(start=start_date, end=end_date)
-            
-            if data.empty:
-                return None
-                
-            return data
+            panel = yf.download(
+                missing, start=start_date, end=end_date, group_by='ticker',
+                threads=True, progress=False, auto_adjust=True
+            )
         except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
+            print(f"Error fetching data for {', '.join(missing)}: {e}")
+            return
+        
+        for ticker in missing:
+            # A single-ticker download may come back without the ticker column level
+            if isinstance(panel.columns, pd.MultiIndex):
+                if ticker not in panel.columns.get_level_values(0):
+                    continue
+                data = panel[ticker].dropna()
+            else:
+                data = panel.dropna()
+            
+            if not data.empty:
+                # Work in naive exchange-local dates regardless of how yfinance returns them
+                data.index = data.index.tz_localize(None)
+                self.price_data[ticker] = data
+                self._save_cached(ticker, start_date, end_date, data)
+    
+    def _save_cached(self, ticker: str, start_date: date, end_date: date, data: pd.DataFrame):
+        """Write price data to the disk cache; failures only cost a re-download next run"""
+        path = self._cache_path(ticker, start_date, end_date)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            data.to_csv(path)
+            # Keep one file per ticker; the fresh download supersedes older windows
+            for old_path in self.cache_dir.glob(f"{ticker}_*.csv"):
+                if old_path != path:
+                    old_path.unlink()
+        except OSError as e:
+            print(f"Could not cache price data for {ticker}: {e}")
+    
+    def get_stock_data(self, ticker: str, start_date: date, end_date: date) -> Optional[pd.DataFrame]:
+        """Slice prefetched stock data to the [start_date, end_date) window"""
+        data = self.price_data.get(ticker)
+        if data is None:
             return None
+        
+        window = data[(data.index >= pd.Timestamp(start_date)) & (data.index < pd.Timestamp(end_date))]
+        if window.empty:
+            return None
+        
+        return window
     
     def calculate_performance(self, mentions: List[StockMention]) -> List[StockPerformance]:
         """Calculate stock performance for each mention"""
         performances = []
-        processed_pairs = set()
         
-        for mention in mentions:
-            pair_key = (mention.ticker, mention.post_date.date())
-            if pair_key in processed_pairs:
-                continue
-            processed_pairs.add(pair_key)
-            
+        # One mention per (ticker, post day); later posts on the same day share its price window
+        pairs = {(m.ticker, m.post_date.date()): m for m in mentions}
+        if not pairs:
+            return performances
+        
+        # Per-ticker price window, so the disk cache is unaffected by other tickers' posts
+        windows: Dict[str, Tuple[date, date]] = {}
+        for ticker, post_day in pairs:
+            start, end = post_day - timedelta(days=1), post_day + timedelta(days=35)
+            if ticker in windows:
+                start, end = min(start, windows[ticker][0]), max(end, windows[ticker][1])
+            windows[ticker] = (start, end)
+        self.prefetch_stock_data(windows)
+        
+        for mention in pairs.values():
             start_date = mention.post_date.date() - timedelta(days=1)
             end_date = mention.post_date.date() + timedelta(days=35)
             
@@ -53,52 +148,40 @@ class StockAnalyzer:
             
             try:
                 post_date = mention.post_date.date()
-                available_dates = stock_data.index.date
                 
-                post_price_date = None
-                for date in available_dates:
-                    if date >= post_date:
-                        post_price_date = date
-                        break
+                close = stock_data['Close'].copy()
+                close.index = close.index.normalize()
+                
+                # Next trading day on/after the post and after each horizon, within 5 days
+                targets = pd.to_datetime(
+                    [post_date] + [post_date + timedelta(days=days) for days, _, _ in self.time_periods]
+                )
+                prices = close.reindex(targets, method='bfill', tolerance=pd.Timedelta(days=5))
                 
-                if post_price_date is None:
+                price_at_post = prices.iloc[0]
+                if pd.isna(price_at_post):
                     print(f"No trading data available for {mention.ticker} after {post_date}")
                     continue
                 
-                price_at_post = stock_data.loc[stock_data.index.date == post_price_date, 'Close'].iloc[0]
-                
                 performance = StockPerformance(
                     ticker=mention.ticker,
                     post_date=mention.post_date,
                     price_at_post=price_at_post
                 )
                 
-                for days, return_attr, price_attr in self.time_periods:
-                    target_date = post_date + timedelta(days=days)
-                    
-                    closest_date = None
-                    min_diff = float('inf')
+                for i, (days, return_attr, price_attr) in enumerate(self.time_periods, start=1):
+                    future_price = prices.iloc[i]
+                    if pd.isna(future_price):
+                        continue
                     
-                    for date in available_dates:
-                        if date >= target_date:
-                            diff = (date - target_date).days
-                            if diff < min_diff:
-                                min_diff = diff
-                                closest_date = date
-                    
-                    if closest_date and min_diff <= 5:
-                        future_price = stock_data.loc[stock_data.index.date == closest_date, 'Close'].iloc[0]
-                        return_pct = ((future_price - price_at_post) / price_at_post) * 100
-                        
-                        setattr(performance, return_attr, return_pct)
-                        setattr(performance, price_attr, future_price)
+                    return_pct = ((future_price - price_at_post) / price_at_post) * 100
+                    setattr(performance, return_attr, return_pct)
+                    setattr(performance, price_attr, future_price)
                 
                 performances.append(performance)
                 
             except Exception as e:
                 print(f"Error calculating performance for {mention.ticker}: {e}")
                 continue
-            
-            time.sleep(self.api_delay)
         
         return performances
\ No newline at end of file
@@ -1,22 +1,40 @@
 """Ticker extraction and validation utilities"""
 
+import functools
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
-from typing import List
+from datetime import timedelta
+from typing import List, Optional
+from config import Config
+from database import Database
 
 class TickerExtractor:
     """Extracts and validates stock tickers from text"""
     
-    def __init__(self, validation_delay: float = 0.2):
+    def __init__(self, validation_delay: float = 0.2, db: Optional[Database] = None, max_workers: int = 8):
         self.validation_delay = validation_delay
-        # Only pattern we need - $ followed by 1-5 uppercase letters
-        self.dollar_ticker_pattern = re.compile(r'\$([A-Z]{1,5})\b')
+        self.db = db
+        self.max_workers = max_workers
+        # Request start times are spaced validation_delay apart across worker threads
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        self.cache_max_age = timedelta(days=Config.TICKER_CACHE_MAX_AGE_DAYS)
+        # Only pattern we need - $ followed by 1-5 letters (case-insensitive), matched on ASCII bytes
+        self.dollar_ticker_pattern = re.compile(rb'\$([A-Za-z]{1,5})\b')
+        # Per-instance memo so a ticker is validated at most once per run;
+        # lookups that raise are not memoised and get retried next time
+        self._lookup_ticker = functools.lru_cache(maxsize=4096)(self._lookup_ticker)
     
     def validate_ticker(self, ticker: str) -> bool:
         """
         Validate if a ticker symbol corresponds to a real stock
         
+        Checks the in-memory and database caches first and only queries
+        Yahoo Finance when the ticker is missing or stale.
+        
         Args:
             ticker: Potential ticker symbol
             
@@ -24,23 +42,35 @@ class TickerExtractor:
             True if valid ticker, False otherwise
         """
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            if not info or len(info) <= 1:
-                return False
-            
-            required_fields = ['symbol', 'longName', 'regularMarketPrice']
-            has_required = any(field in info for field in required_fields)
-            
-            hist = stock.history(period="5d")
-            has_price_data = not hist.empty
-            
-            return has_required and has_price_data
-            
+            return self._lookup_ticker(ticker)
         except Exception:
             return False
     
+    def _lookup_ticker(self, ticker: str) -> bool:
+        """Resolve a ticker's validity; raises if Yahoo Finance cannot be reached"""
+        if self.db is not None:
+            cached = self.db.get_ticker_validation(ticker, self.cache_max_age)
+            if cached is not None:
+                return cached
+        
+        self._wait_for_request_slot()
+        is_valid = not yf.Ticker(ticker).history(period="5d").empty
+        
+        if self.db is not None:
+            self.db.save_ticker_validation(ticker, is_valid)
+        
+        return is_valid
+    
+    def _wait_for_request_slot(self):
+        """Space Yahoo Finance request start times validation_delay apart across threads"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.validation_delay
+        
+        if wait > 0:
+            time.sleep(wait)
+    
     def extract_tickers_from_text(self, text: str) -> List[str]:
         """
         Extract stock tickers that follow $ symbol (e.g., $AAPL, $TSLA)
@@ -51,27 +81,20 @@ class TickerExtractor:
         Returns:
             List of validated ticker symbols
         """
-        validated_tickers = set()
-        
-        # Only look for $TICKER format
-        dollar_tickers = self.dollar_ticker_pattern.findall(text.upper())
+        # Only look for $TICKER format; dedupe while matching. Non-ASCII characters
+        # become '?' so they still act as word boundaries rather than vanishing.
+        data = text.encode('ascii', 'replace')
+        unique_tickers = list({m.group(1).upper().decode() for m in self.dollar_ticker_pattern.finditer(data)})
         
-        if not dollar_tickers:
-            print(f"  No $TICKER format found in text")
+        if not unique_tickers:
             return []
         
-        # Remove duplicates
-        unique_tickers = list(set(dollar_tickers))
-        print(f"  Found {len(unique_tickers)} tickers with $ prefix: {unique_tickers}")
+        # Most posts name a single ticker; skip the pool overhead for those
+        if len(unique_tickers) == 1:
+            return unique_tickers if self.validate_ticker(unique_tickers[0]) else []
         
-        # Validate each ticker
-        for ticker in unique_tickers:
-            print(f"    Validating ${ticker}...", end=" ")
-            if self.validate_ticker(ticker):
-                validated_tickers.add(ticker)
-                print("✓ Valid")
-            else:
-                print("✗ Invalid")
-            time.sleep(self.validation_delay)
+        # Validate concurrently; the lookups are network-bound
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique_tickers))) as executor:
+            results = dict(zip(unique_tickers, executor.map(self.validate_ticker, unique_tickers)))
         
-        return list(validated_tickers)
\ No newline at end of file
+        return [ticker for ticker, is_valid in results.items() if is_valid]
\ No newline at end of file
@@ -1,51 +1,74 @@
 """Data visualization and analysis reporting"""
 
+import warnings
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Dict, List
+import matplotlib
+matplotlib.use('Agg')  # headless: figures are only ever written to file
+from matplotlib.figure import Figure
+from typing import Dict
+
+# Light grid on a white background (the look seaborn's "whitegrid" style gave us)
+matplotlib.rcParams.update({
+    'axes.grid': True,
+    'axes.axisbelow': True,
+    'axes.facecolor': 'white',
+    'axes.edgecolor': '.8',
+    'grid.color': '.8',
+})
 
 class Visualizer:
     """Creates visualizations and reports from analysis data"""
     
-    def __init__(self):
-        sns.set_style("whitegrid")
-    
-    def analyze_profitability(self, data: List[tuple]) -> Dict:
+    def analyze_profitability(self, df: pd.DataFrame) -> Dict:
         """Analyze profitability from performance data"""
-        if not data:
+        if df.empty:
             return {"error": "No performance data available"}
         
-        columns = ['id', 'ticker', 'post_date', 'price_at_post', 'price_1d', 'price_3d', 
-                  'price_1w', 'price_2w', 'price_1m', 'return_1d', 'return_3d', 
-                  'return_1w', 'return_2w', 'return_1m']
-        
-        df = pd.DataFrame(data, columns=columns)
-        
         results = {
             'total_stocks_analyzed': len(df),
             'time_periods': {}
         }
         
-        for period in ['1d', '3d', '1w', '2w', '1m']:
-            return_col = f'return_{period}'
-            valid_data = df[return_col].dropna()
-            
-            if len(valid_data) > 0:
-                results['time_periods'][period] = {
-                    'count': len(valid_data),
-                    'mean_return': valid_data.mean(),
-                    'median_return': valid_data.median(),
-                    'std_return': valid_data.std(),
-                    'positive_returns': (valid_data > 0).sum(),
-                    'negative_returns': (valid_data < 0).sum(),
-                    'win_rate': (valid_data > 0).mean() * 100,
-                    'best_return': valid_data.max(),
-                    'worst_return': valid_data.min(),
-                    'returns_over_10pct': (valid_data > 10).sum(),
-                    'returns_over_25pct': (valid_data > 25).sum(),
-                    'returns_under_minus10pct': (valid_data < -10).sum(),
-                }
+        periods = ['1d', '3d', '1w', '2w', '1m']
+        arr = df[[f'return_{period}' for period in periods]].to_numpy(dtype=float)
+        
+        # Column-wise stats in single NumPy passes; periods with no data are skipped
+        counts = np.sum(~np.isnan(arr), axis=0)
+        has_data = counts > 0
+        periods = [period for period, keep in zip(periods, has_data) if keep]
+        arr = arr[:, has_data]
+        counts = counts[has_data]
+        
+        with warnings.catch_warnings():
+            # A single sample has no std; leave it as NaN like pandas does
+            warnings.simplefilter('ignore', RuntimeWarning)
+            std = np.nanstd(arr, axis=0, ddof=1)
+        
+        positive = np.sum(arr > 0, axis=0)
+        stats = zip(
+            periods, counts, np.nanmean(arr, axis=0), np.nanmedian(arr, axis=0),
+            std, positive, np.sum(arr < 0, axis=0),
+            np.nanmax(arr, axis=0), np.nanmin(arr, axis=0), np.sum(arr > 10, axis=0),
+            np.sum(arr > 25, axis=0), np.sum(arr < -10, axis=0)
+        )
+        
+        for (period, count, mean, median, stdev, pos, neg, best, worst,
+             over_10, over_25, under_minus_10) in stats:
+            results['time_periods'][period] = {
+                'count': count,
+                'mean_return': mean,
+                'median_return': median,
+                'std_return': stdev,
+                'positive_returns': pos,
+                'negative_returns': neg,
+                'win_rate': pos / count * 100,
+                'best_return': best,
+                'worst_return': worst,
+                'returns_over_10pct': over_10,
+                'returns_over_25pct': over_25,
+                'returns_under_minus10pct': under_minus_10,
+            }
         
         return results
     
@@ -75,23 +98,23 @@ class Visualizer:
             print(f"  Returns < -10%: {stats['returns_under_minus10pct']}")
             print()
     
-    def create_visualizations(self, data: List[tuple], output_file: str = 'reddit_pennystocks_analysis.png'):
+    def create_visualizations(self, df: pd.DataFrame, output_file: str = 'reddit_pennystocks_analysis.png'):
         """Create comprehensive visualizations"""
-        if not data:
+        if df.empty:
             print("No data available for visualization")
             return
         
-        columns = ['id', 'ticker', 'post_date', 'price_at_post', 'price_1d', 'price_3d', 
-                  'price_1w', 'price_2w', 'price_1m', 'return_1d', 'return_3d', 
-                  'return_1w', 'return_2w', 'return_1m']
-        
-        df = pd.DataFrame(data, columns=columns)
-        
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+        fig = Figure(figsize=(18, 12))
+        axes = fig.subplots(2, 3)
         fig.suptitle('Reddit r/pennystocks Performance Analysis', fontsize=16)
         
         periods = ['1d', '3d', '1w', '2w', '1m']
         
+        # Shared bin edges across all periods so the distributions are directly comparable
+        all_returns = df[[f'return_{period}' for period in periods]].to_numpy(dtype=float).ravel()
+        all_returns = all_returns[~np.isnan(all_returns)]
+        edges = np.histogram_bin_edges(all_returns, bins=30) if all_returns.size else None
+        
         # Distribution plots
         for i, period in enumerate(periods):
             row = i // 3
@@ -101,7 +124,9 @@ class Visualizer:
             valid_data = df[return_col].dropna()
             
             if len(valid_data) > 0:
-                axes[row, col].hist(valid_data, bins=30, alpha=0.7, edgecolor='black')
+                counts, _ = np.histogram(valid_data.to_numpy(), bins=edges)
+                axes[row, col].bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+                                   alpha=0.7, edgecolor='black')
                 axes[row, col].axvline(valid_data.mean(), color='red', linestyle='--', 
                                      label=f'Mean: {valid_data.mean():.1f}%')
                 axes[row, col].axvline(0, color='black', linestyle='-', alpha=0.5)
@@ -144,7 +169,6 @@ class Visualizer:
             ax.legend(loc='upper left')
             ax2.legend(loc='upper right')
         
-        plt.tight_layout()
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Visualization saved to {output_file}")
-        plt.show()
\ No newline at end of file
+        fig.tight_layout()
+        fig.savefig(output_file, dpi=150, bbox_inches='tight')
+        print(f"Visualization saved to {output_file}")
\ No newline at end of file